@@ -1,5 +1,6 @@
 import streamlit as st
 from src.rag_pipeline import RAGPipeline
+from src.conversation import ConversationSession
 
 # ---------------------------
 # Initialize pipeline
@@ -24,6 +25,9 @@ st.info("⚠️ Disclaimer: This demo is for educational purposes only. Not medi
 # ---------------------------
 if "messages" not in st.session_state:
     st.session_state.messages = []
+if "rag_session" not in st.session_state:
+    # Retrieval state shared across follow-up questions in this chat
+    st.session_state.rag_session = ConversationSession()
 
 # ---------------------------
 # Display chat messages
@@ -54,7 +58,7 @@ if user_input := st.chat_input("Type your question here..."):
     # Run pipeline
     with st.chat_message("assistant"):
         with st.spinner("Thinking..."):
-            result = rag.answer(user_input, top_k=5)
+            result = rag.answer_in_session(user_input, st.session_state.rag_session, top_k=5)
             response = result["response"]
 
         st.markdown(response)
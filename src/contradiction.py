@@ -1,4 +1,4 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from transformers import pipeline
 
 
@@ -16,10 +16,18 @@ class ContradictionResolver:
             device_map="auto" if device == "auto" else None,
         )
 
-    def detect_pairs(self, chunks: List[Dict]) -> List[Tuple[int, int, str]]:
+    def detect_pairs(self, chunks: List[Dict], cache: Optional[Dict] = None) -> List[Tuple[int, int, str]]:
         pairs = []
         for i in range(len(chunks)):
             for j in range(i + 1, len(chunks)):
+                # Reuse earlier NLI verdicts (cache maps sorted (chunk_id_a, chunk_id_b) -> label).
+                # Sorted so a pair still hits when a follow-up reranks the pool into a new order.
+                key = tuple(sorted((chunks[i]["chunk_id"], chunks[j]["chunk_id"])))
+                if cache is not None and key in cache:
+                    if "CONTRADICTION" in cache[key].upper():
+                        pairs.append((i, j, "contradiction"))
+                    continue
+
                 a, b = chunks[i]["text"], chunks[j]["text"]
 
                 # Run NLI (handle pipeline output variations)
@@ -40,6 +48,8 @@ class ContradictionResolver:
 
                 # Pick best label
                 label = max(preds, key=lambda x: x.get("score", 0))["label"]
+                if cache is not None:
+                    cache[key] = label
 
                 if "CONTRADICTION" in label.upper():
                     pairs.append((i, j, "contradiction"))
@@ -0,0 +1,122 @@
+import re
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class ConversationSession:
+    """
+    Per-conversation state for multi-turn answering:
+    - Turn history (original user questions + their standalone rewrites)
+    - Topic anchor: the first self-contained question of the current topic,
+      its embedding (used to detect drift) and its candidate pool
+    - NLI verdicts cached per topic; cross-encoder scores are cached too, but
+      they are query-specific, so they only hit when a standalone query repeats
+    """
+
+    # Anaphora that usually mean "the thing we were just talking about"
+    FOLLOW_UP_TERMS = {
+        "it", "its", "it's", "they", "them", "their", "this", "that",
+        "these", "those", "same",
+    }
+    FOLLOW_UP_PREFIXES = ("what about", "how about", "and ", "what else", "anything else")
+    # Words that carry no topic of their own when counting content words
+    FILLER_TERMS = {
+        "a", "an", "the", "is", "are", "was", "were", "be", "for", "of", "to", "in", "on",
+        "and", "or", "with", "what", "which", "who", "how", "when", "why", "can", "does",
+        "do", "should", "i", "my", "me", "about", "any", "also", "there",
+    }
+    # Generic clinical words that need a topic to mean anything ("side effects", "dose")
+    GENERIC_TERMS = {
+        "side", "effect", "effects", "dose", "doses", "dosage", "take", "taking", "taken",
+        "safe", "safety", "risk", "risks", "work", "works", "long", "often", "much", "many",
+        "use", "used", "using", "start", "stop", "alternative", "alternatives", "interactions",
+        "help", "helps", "else", "other", "options", "okay", "ok", "normal", "good", "bad",
+        "best", "better", "worse", "need", "get", "time", "day", "daily",
+    }
+
+    def __init__(self, drift_threshold: float = 0.55, max_history: int = 10,
+                 max_follow_up_terms: int = 2, max_context_chars: int = 200):
+        self.drift_threshold = drift_threshold
+        self.max_history = max_history
+        self.max_follow_up_terms = max_follow_up_terms
+        self.max_context_chars = max_context_chars
+
+        self.history: List[Dict] = []
+        self.topic: Optional[str] = None
+        self.anchor_embedding: Optional[np.ndarray] = None
+        self.candidate_pool: List[Dict] = []
+
+        # (query, chunk_id) -> cross-encoder score
+        self.rerank_cache: Dict[Tuple[str, str], float] = {}
+        # (chunk_id_a, chunk_id_b) -> NLI label
+        self.nli_cache: Dict[Tuple[str, str], str] = {}
+
+    # ---------------------------
+    # Follow-up detection + rewriting
+    # ---------------------------
+    def is_follow_up(self, query: str) -> bool:
+        """
+        A follow-up opens with a follow-up phrase ("what about ..."), names no
+        topic at all ("What dose should I take?"), or leans on an anaphor
+        ("is it safe in pregnancy?") while naming almost nothing itself.
+        Short self-contained questions ("What is CKD?") are not follow-ups.
+        """
+        if self.topic is None:
+            return False
+        q = query.strip().lower()
+        if q.startswith(self.FOLLOW_UP_PREFIXES):
+            return True
+        tokens = re.findall(r"[a-z0-9']+", q)
+        content = [t for t in tokens if t not in self.FOLLOW_UP_TERMS and t not in self.FILLER_TERMS]
+        topical = [t for t in content if t not in self.GENERIC_TERMS]
+        if not topical:
+            return True
+        if not any(t in self.FOLLOW_UP_TERMS for t in tokens):
+            return False
+        return len(content) <= self.max_follow_up_terms
+
+    def rewrite(self, query: str) -> str:
+        """
+        Expand a follow-up into a standalone query using the topic anchor and
+        the previous original question. Previous rewrites are never reused, so
+        the context cannot nest. Self-contained questions pass through.
+        """
+        if not self.is_follow_up(query):
+            return query
+
+        parts = [self.topic]
+        if self.history and self.history[-1]["query"] != self.topic:
+            parts.append(self.history[-1]["query"])
+        context = "; ".join(p.strip() for p in parts)[: self.max_context_chars]
+        return f"{query.strip()} (context: {context})"
+
+    # ---------------------------
+    # Topic drift
+    # ---------------------------
+    def similarity(self, embedding: np.ndarray) -> Optional[float]:
+        if self.anchor_embedding is None:
+            return None
+        # Embeddings are normalized, so the dot product is the cosine similarity
+        return float(np.dot(self.anchor_embedding, embedding))
+
+    def can_reuse(self, embedding: np.ndarray) -> bool:
+        sim = self.similarity(embedding)
+        return bool(self.candidate_pool) and sim is not None and sim >= self.drift_threshold
+
+    def reset_topic(self, topic: str, embedding: np.ndarray, candidates: List[Dict],
+                    rerank_cache: Optional[Dict] = None, nli_cache: Optional[Dict] = None):
+        """Start a new topic: new anchor, new pool, fresh score caches."""
+        self.topic = topic
+        self.anchor_embedding = embedding
+        self.candidate_pool = [dict(c) for c in candidates]
+        self.rerank_cache = rerank_cache if rerank_cache is not None else {}
+        self.nli_cache = nli_cache if nli_cache is not None else {}
+
+    def pool(self) -> List[Dict]:
+        # Copies, so reranking one turn never leaks scores into the next
+        return [dict(c) for c in self.candidate_pool]
+
+    def add_turn(self, query: str, standalone: str):
+        self.history.append({"query": query, "standalone": standalone})
+        self.history = self.history[-self.max_history:]
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from typing import List, Dict, Optional
+
+from transformers import pipeline
+
+log = logging.getLogger(__name__)
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "for", "of", "to", "in", "on",
+    "and", "or", "with", "what", "which", "who", "how", "when", "why", "can", "does",
+    "do", "should", "i", "my", "it", "its", "about", "there", "any",
+}
+
+
+class Seq2SeqGenerator:
+    """
+    Abstractive backend: a Hugging Face text2text-generation pipeline.
+    Model and decoding limits are configurable; `params` feeds the cache key.
+    """
+
+    def __init__(self, model_name: str = "google/flan-t5-base", device: str = "cpu",
+                 max_length: int = 256, do_sample: bool = False, **gen_kwargs):
+        self.model_name = model_name
+        self.gen_kwargs = dict(max_length=max_length, do_sample=do_sample, **gen_kwargs)
+        self.pipe = pipeline(
+            "text2text-generation",
+            model=model_name,
+            device=0 if device == "cuda" else -1
+        )
+
+    @property
+    def params(self) -> Dict:
+        return {"model": self.model_name, **self.gen_kwargs}
+
+    def generate(self, prompt: str) -> str:
+        gen = self.pipe(prompt, **self.gen_kwargs)
+        return gen[0]["generated_text"]
+
+
+class PromptCache:
+    """
+    Bounded disk cache for generated answers.
+    - Key: sha256 of the exact prompt + generation parameters
+    - One JSON file per entry; oldest entries are evicted past `max_entries`
+    - Best effort: I/O failures are logged and ignored, never raised
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = 1000):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(prompt: str, params: Dict) -> str:
+        payload = json.dumps({"prompt": prompt, "params": params}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = json.load(f)["text"]
+        except (OSError, ValueError, KeyError):
+            return None
+        # Touch on hit so eviction is least-recently-used
+        try:
+            os.utime(path, None)
+        except OSError as e:
+            log.warning("prompt cache: could not touch %s: %s", path, e)
+        return text
+
+    def put(self, key: str, text: str):
+        # Write to a temp file and rename, so readers never see a partial entry
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"text": text}, f, ensure_ascii=False)
+                os.replace(tmp, self._path(key))
+            except BaseException:
+                os.remove(tmp)
+                raise
+            self._evict()
+        except OSError as e:
+            log.warning("prompt cache: could not store %s: %s", key, e)
+
+    def _evict(self):
+        files = [os.path.join(self.cache_dir, fn) for fn in os.listdir(self.cache_dir) if fn.endswith(".json")]
+        if len(files) <= self.max_entries:
+            return
+
+        def mtime(fp):
+            # Entries may vanish under a concurrent eviction
+            try:
+                return os.path.getmtime(fp)
+            except OSError:
+                return 0.0
+
+        files.sort(key=mtime)
+        for fp in files[: len(files) - self.max_entries]:
+            try:
+                os.remove(fp)
+            except OSError:
+                pass
+
+
+class ExtractiveAnswerer:
+    """
+    Retrieval-only answers: picks the sentences from the given chunks that
+    overlap most with the query, each followed by its chunk citation.
+    Callers decide which chunks are trustworthy enough to quote.
+    """
+
+    def __init__(self, max_sentences: int = 3, max_chunks: int = 3):
+        self.max_sentences = max_sentences
+        self.max_chunks = max_chunks
+
+    @staticmethod
+    def _tokens(text: str) -> set:
+        return {t for t in re.findall(r"[a-z0-9\-]+", text.lower()) if t not in STOPWORDS}
+
+    @staticmethod
+    def _sentences(text: str) -> List[str]:
+        # Drop markdown headings/emphasis and forum "OP:"/"Reply:" labels,
+        # then split on sentence ends and line breaks
+        text = re.sub(r"^#+\s.*$", "", text, flags=re.MULTILINE).replace("**", "")
+        text = re.sub(r"^(OP|Reply):\s*", "", text, flags=re.MULTILINE)
+        parts = re.split(r"(?<=[.!?])\s+|\n+", text)
+        return [p.strip(" -*") for p in parts if len(p.strip(" -*")) > 20]
+
+    def answer(self, query: str, chunks: List[Dict]) -> str:
+        q_tokens = self._tokens(query)
+        scored = []
+        for rank, c in enumerate(chunks[: self.max_chunks]):
+            for pos, sent in enumerate(self._sentences(c["text"])):
+                overlap = len(q_tokens & self._tokens(sent))
+                if overlap == 0:
+                    continue
+                # Ties go to higher-ranked chunks, then earlier sentences
+                scored.append((overlap, -rank, -pos, sent, c))
+
+        best = sorted(scored, key=lambda x: x[:3], reverse=True)[: self.max_sentences]
+        return " ".join(f"{sent} [{c['chunk_id']}]" for _, _, _, sent, c in best)
+
+
+class AnswerGenerator:
+    """
+    Chooses how an answer is produced, cheapest first:
+    - "extractive": top chunk clearly beats the runner-up (rerank margin);
+      only chunks above `min_score` and within the margin of the top are quoted
+    - "cache": the exact prompt + params were generated before
+    - "model": run the abstractive backend (and cache the result)
+    """
+
+    def __init__(self, backend: Seq2SeqGenerator, cache: Optional[PromptCache] = None,
+                 extractive: Optional[ExtractiveAnswerer] = None, extractive_margin: float = 5.0,
+                 min_score: float = 0.3):
+        self.backend = backend
+        self.cache = cache
+        self.extractive = extractive
+        self.extractive_margin = extractive_margin
+        self.min_score = min_score
+
+    def generate(self, query: str, chunks: List[Dict], prompt: str, exclude: Optional[set] = None) -> Dict:
+        """
+        `query` should be the user's own question (it drives extractive sentence
+        matching); `exclude` holds chunk_ids discarded by contradiction resolution,
+        which are never quoted.
+        """
+        exclude = exclude or set()
+        if self.extractive is not None and self._margin(chunks) >= self.extractive_margin:
+            top = chunks[0]
+            # Only take the fast path when the chunk that earned the margin survived,
+            # and never quote the weak runner-ups that created the margin
+            if top["chunk_id"] not in exclude and top["rerank_score"] >= self.min_score:
+                quotable = [
+                    c for c in chunks
+                    if c["chunk_id"] not in exclude
+                    and c["rerank_score"] >= self.min_score
+                    and top["rerank_score"] - c["rerank_score"] < self.extractive_margin
+                ]
+                text = self.extractive.answer(query, quotable)
+                if text:
+                    return {"text": text, "path": "extractive"}
+
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(prompt, self.backend.params)
+            text = self.cache.get(key)
+            if text is not None:
+                return {"text": text, "path": "cache"}
+
+        text = self.backend.generate(prompt)
+        if self.cache is not None:
+            self.cache.put(key, text)
+        return {"text": text, "path": "model"}
+
+    @staticmethod
+    def _margin(chunks: List[Dict]) -> float:
+        if not chunks:
+            return float("-inf")
+        if len(chunks) == 1:
+            return float("inf")
+        return chunks[0]["rerank_score"] - chunks[1]["rerank_score"]
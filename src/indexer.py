@@ -2,7 +2,7 @@ import numpy as np
 from rank_bm25 import BM25Okapi
 from sentence_transformers import SentenceTransformer
 import faiss
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 
 
 class HybridIndex:
@@ -52,10 +52,16 @@ class HybridIndex:
         idx = np.argsort(scores)[::-1][:k]
         return [(int(i), float(scores[i])) for i in idx]
 
+    # ---------------------------
+    # Query embedding (normalized, same space as the index)
+    # ---------------------------
+    def encode_query(self, query: str) -> np.ndarray:
+        return self.model.encode([query], convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)[0]
+
     # ---------------------------
     # Dense search
     # ---------------------------
-    def dense_search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
-        q = self.model.encode([query], convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)[0]
+    def dense_search(self, query: str, k: int = 10, q_emb: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        q = q_emb if q_emb is not None else self.encode_query(query)
         sims, ids = self.faiss_index.search(q.reshape(1, -1).astype("float32"), k)
         return [(int(ids[0][i]), float(sims[0][i])) for i in range(k)]
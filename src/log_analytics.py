@@ -0,0 +1,237 @@
+import argparse
+import csv
+import glob
+import json
+import math
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Iterator, Optional
+
+
+FALLBACK_ANSWER = "No relevant answer found"
+
+# Ignored when comparing queries for paraphrase clusters
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "for", "of", "to", "in", "on", "and", "or", "with",
+    "what", "which", "how", "when", "why", "can", "does", "do", "should", "i", "my",
+}
+
+# Histogram bin widths (cross-encoder logits vs fused [0,1]+prior scores)
+BIN_WIDTHS = {"rerank_score": 1.0, "score": 0.1}
+
+
+class LogStats:
+    """
+    Mergeable aggregates over query log records.
+    Only counters are kept, so memory grows with distinct queries/chunks,
+    not with the number of records.
+    """
+
+    def __init__(self):
+        self.records = 0
+        self.fallbacks = 0
+        self.queries = Counter()
+        self.chunks = Counter()
+        self.contradictions = Counter()
+        self.generators = Counter()
+        self.histograms = {name: Counter() for name in BIN_WIDTHS}
+        self.moments = {name: {"count": 0, "sum": 0.0, "min": math.inf, "max": -math.inf} for name in BIN_WIDTHS}
+
+    # ---------------------------
+    # Add one record
+    # ---------------------------
+    def add(self, record: Dict):
+        self.records += 1
+        # Session turns log the rewritten query; count what the user actually asked
+        self.queries[normalize_query(record.get("original_query") or record.get("query", ""))] += 1
+
+        retrieved = record.get("retrieved") or []
+        answer = record.get("answer")
+        if not retrieved or answer == FALLBACK_ANSWER:
+            self.fallbacks += 1
+
+        self.generators[record.get("generator", "unknown")] += 1
+
+        for c in retrieved:
+            self.chunks[c.get("chunk_id", "unknown")] += 1
+            for name, width in BIN_WIDTHS.items():
+                v = c.get(name)
+                if v is None:
+                    continue
+                # Integer bin index; edges are computed at report time
+                self.histograms[name][math.floor(v / width)] += 1
+                m = self.moments[name]
+                m["count"] += 1
+                m["sum"] += v
+                m["min"] = min(m["min"], v)
+                m["max"] = max(m["max"], v)
+
+        # Contradiction pairs are logged as indices into `retrieved`
+        for pair in record.get("contradictions") or []:
+            i, j = pair[0], pair[1]
+            if i < len(retrieved) and j < len(retrieved):
+                a, b = sorted([retrieved[i].get("chunk_id"), retrieved[j].get("chunk_id")])
+                self.contradictions[(a, b)] += 1
+
+    # ---------------------------
+    # Merge per-file partials
+    # ---------------------------
+    def merge(self, other: "LogStats"):
+        self.records += other.records
+        self.fallbacks += other.fallbacks
+        self.queries.update(other.queries)
+        self.chunks.update(other.chunks)
+        self.contradictions.update(other.contradictions)
+        self.generators.update(other.generators)
+        for name in BIN_WIDTHS:
+            self.histograms[name].update(other.histograms[name])
+            m, o = self.moments[name], other.moments[name]
+            m["count"] += o["count"]
+            m["sum"] += o["sum"]
+            m["min"] = min(m["min"], o["min"])
+            m["max"] = max(m["max"], o["max"])
+
+
+def normalize_query(q: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9\-]+", q.lower()))
+
+
+def iter_records(path: str) -> Iterator[Dict]:
+    """Yield records from a single-record .json log or a .jsonl file, one at a time."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield json.load(f)
+
+
+def stats_for_files(paths: List[str]) -> LogStats:
+    stats = LogStats()
+    for path in paths:
+        try:
+            for record in iter_records(path):
+                # Skip entries that parse but aren't log records (lists, numbers, ...)
+                if isinstance(record, dict):
+                    stats.add(record)
+        except (OSError, ValueError):
+            # Skip unreadable or half-written logs
+            continue
+    return stats
+
+
+def collect(log_dir: str, workers: Optional[int] = None, batch_size: int = 64) -> LogStats:
+    paths = sorted(glob.glob(os.path.join(log_dir, "*.json")) + glob.glob(os.path.join(log_dir, "*.jsonl")))
+    batches = [paths[i : i + batch_size] for i in range(0, len(paths), batch_size)]
+
+    total = LogStats()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(stats_for_files, batches):
+            total.merge(partial)
+    return total
+
+
+# ---------------------------
+# Paraphrase clusters (greedy, Jaccard over content words)
+# ---------------------------
+def cluster_queries(queries: Counter, threshold: float = 0.6) -> List[Dict]:
+    clusters = []
+    for q, n in queries.most_common():
+        tokens = {t for t in q.split() if t not in STOPWORDS}
+        for cl in clusters:
+            union = tokens | cl["tokens"]
+            if union and len(tokens & cl["tokens"]) / len(union) >= threshold:
+                cl["queries"].append(q)
+                cl["count"] += n
+                break
+        else:
+            clusters.append({"representative": q, "queries": [q], "count": n, "tokens": tokens})
+
+    clusters.sort(key=lambda c: c["count"], reverse=True)
+    return [{k: v for k, v in c.items() if k != "tokens"} for c in clusters]
+
+
+# ---------------------------
+# Reports
+# ---------------------------
+def build_report(stats: LogStats, top_n: int = 20) -> Dict:
+    def summary(name):
+        m = stats.moments[name]
+        if not m["count"]:
+            return {"count": 0}
+        return {"count": m["count"], "mean": m["sum"] / m["count"], "min": m["min"], "max": m["max"]}
+
+    return {
+        "records": stats.records,
+        "fallback_rate": stats.fallbacks / stats.records if stats.records else 0.0,
+        "generator_paths": dict(stats.generators),
+        "top_queries": [{"query": q, "count": n} for q, n in stats.queries.most_common(top_n)],
+        "query_clusters": [c for c in cluster_queries(stats.queries) if len(c["queries"]) > 1 or c["count"] > 1],
+        "score_distributions": {
+            name: {
+                **summary(name),
+                "bin_width": BIN_WIDTHS[name],
+                "histogram": [
+                    {"bin": round(i * BIN_WIDTHS[name], 6), "count": n}
+                    for i, n in sorted(stats.histograms[name].items())
+                ],
+            }
+            for name in BIN_WIDTHS
+        },
+        "chunk_frequency": [{"chunk_id": c, "count": n} for c, n in stats.chunks.most_common()],
+        "contradiction_pairs": [
+            {"a": a, "b": b, "count": n} for (a, b), n in stats.contradictions.most_common()
+        ],
+    }
+
+
+def _write_csv(path: str, header: List[str], rows: List[List]):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def write_reports(report: Dict, out_dir: str):
+    os.makedirs(out_dir, exist_ok=True)
+
+    with open(os.path.join(out_dir, "report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    _write_csv(os.path.join(out_dir, "top_queries.csv"), ["query", "count"],
+               [[r["query"], r["count"]] for r in report["top_queries"]])
+    _write_csv(os.path.join(out_dir, "query_clusters.csv"), ["representative", "count", "queries"],
+               [[c["representative"], c["count"], " | ".join(c["queries"])] for c in report["query_clusters"]])
+    _write_csv(os.path.join(out_dir, "score_histograms.csv"), ["metric", "bin", "count"],
+               [[name, h["bin"], h["count"]]
+                for name, dist in report["score_distributions"].items() for h in dist["histogram"]])
+    _write_csv(os.path.join(out_dir, "chunk_frequency.csv"), ["chunk_id", "count"],
+               [[r["chunk_id"], r["count"]] for r in report["chunk_frequency"]])
+    _write_csv(os.path.join(out_dir, "contradiction_pairs.csv"), ["a", "b", "count"],
+               [[r["a"], r["b"], r["count"]] for r in report["contradiction_pairs"]])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--log_dir", default="logs", help="Directory with query-*.json logs")
+    parser.add_argument("--out", default="reports", help="Output directory for JSON/CSV reports")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--top_n", type=int, default=20, help="Number of top queries to report")
+    args = parser.parse_args()
+
+    stats = collect(args.log_dir, workers=args.workers)
+    report = build_report(stats, top_n=args.top_n)
+    write_reports(report, args.out)
+
+    print("\n📈 Log Analytics")
+    print("-----------------------")
+    print("Records      :", report["records"])
+    print("Fallback rate:", round(report["fallback_rate"], 3))
+    print("Reports      :", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 import os
-from transformers import pipeline
 
 from .chunking import chunk_docs, chunk_forums, chunk_blogs
 from .indexer import HybridIndex
@@ -8,6 +7,8 @@ from .retriever import HybridRetriever
 from .reranker import Reranker
 from .contradiction import ContradictionResolver
 from .logger_setup import JsonLogger
+from .conversation import ConversationSession
+from .generator import AnswerGenerator, Seq2SeqGenerator, PromptCache, ExtractiveAnswerer
 
 
 class RAGPipeline:
@@ -17,11 +18,22 @@ class RAGPipeline:
     - Builds hybrid index (BM25 + dense)
     - Retrieves + reranks candidates
     - Detects and resolves contradictions
-    - Synthesizes a simple answer
+    - Synthesizes an answer (extractive fast path, cached or generated)
+    - Reuses retrieval across follow-up turns (answer_in_session)
     - Logs everything to JSON
     """
 
-    def __init__(self, data_root: str, log_dir: str, device: str = "cuda"):
+    def __init__(
+        self,
+        data_root: str,
+        log_dir: str,
+        device: str = "cuda",
+        gen_model: str = "google/flan-t5-base",
+        gen_max_length: int = 256,
+        cache_dir: Optional[str] = ".cache/generator",
+        cache_size: int = 1000,
+        extractive_margin: float = 5.0,
+    ):
         self.logger = JsonLogger(log_dir)
 
         # ---------------------------
@@ -49,10 +61,18 @@ class RAGPipeline:
         # ---------------------------
         self.contra = ContradictionResolver(device=device)
 
-        self.generator = pipeline(
-            "text2text-generation",
-            model="google/flan-t5-base",   # or mistral-7b if you have GPU
-            device=0 if device=="cuda" else -1
+        # ---------------------------
+        # Step 5: Generation (extractive fast path -> prompt cache -> model)
+        # ---------------------------
+        self.generator = AnswerGenerator(
+            backend=Seq2SeqGenerator(
+                model_name=gen_model,   # or mistral-7b if you have GPU
+                device=device,
+                max_length=gen_max_length,
+            ),
+            cache=PromptCache(cache_dir, max_entries=cache_size) if cache_dir else None,
+            extractive=ExtractiveAnswerer(),
+            extractive_margin=extractive_margin,
         )
 
     # ---------------------------
@@ -63,27 +83,83 @@ class RAGPipeline:
         candidates = self.retriever.search(query, top_k=max(top_k * 3, 10))
         reranked = self.reranker.rerank(query, candidates, top_k=top_k)
 
+        return self._answer_reranked(query, reranked, log_extra={}, raw_query=query)
+
+    # ---------------------------
+    # Answer a follow-up within a conversation
+    # ---------------------------
+    def answer_in_session(self, query: str, session: ConversationSession, top_k: int = 5) -> Dict:
+        # 1. Rewrite follow-ups ("what about its side effects?") into a standalone query.
+        #    Self-contained questions are left as-is, so drift is measured on the raw text.
+        follow_up = session.is_follow_up(query)
+        standalone = session.rewrite(query)
+        q_emb = self.index.encode_query(standalone)
+        similarity = session.similarity(q_emb)
+
+        # 2. Reuse the previous candidate pool + caches unless the topic drifted
+        reused = session.can_reuse(q_emb)
+        if reused:
+            candidates = session.pool()
+            rerank_cache, nli_cache = session.rerank_cache, session.nli_cache
+        else:
+            candidates = self.retriever.search(standalone, top_k=max(top_k * 3, 10), q_emb=q_emb)
+            rerank_cache, nli_cache = {}, {}
+
+        reranked = self.reranker.rerank(standalone, candidates, top_k=top_k, cache=rerank_cache)
+
+        result = self._answer_reranked(
+            standalone,
+            reranked,
+            log_extra={
+                "original_query": query,
+                "follow_up": follow_up,
+                "reused_pool": reused,
+                "drift_similarity": similarity,
+            },
+            nli_cache=nli_cache,
+            raw_query=query,
+        )
+
+        # 3. Only answered turns become conversation context (skip the low-confidence fallback)
+        if result["citations"]:
+            if not reused:
+                # A drifted follow-up keeps the old topic text *and* its anchor embedding,
+                # so the anchor never becomes the embedding of a "(context: ...)" rewrite
+                if follow_up:
+                    topic, anchor = session.topic, session.anchor_embedding
+                else:
+                    topic, anchor = query, q_emb
+                session.reset_topic(topic, anchor, candidates, rerank_cache=rerank_cache, nli_cache=nli_cache)
+            session.add_turn(query, standalone)
+
+        return result
+
+    def _answer_reranked(self, query: str, reranked: List[Dict], log_extra: Dict,
+                         nli_cache: Dict = None, raw_query: str = None) -> Dict:
         if not reranked or reranked[0]["rerank_score"] < 0.3:
             return {
                 "response": "Sorry, I don’t have enough reliable information in my knowledge sources to answer this question.",
                 "citations": [],
                 "log_file": self.logger.log({
                     "query": query,
+                    **log_extra,
                     "retrieved": [],
-                    "answer": "No relevant answer found"
+                    "answer": "No relevant answer found",
+                    "generator": "fallback",
                 })
             }
 
         # 2. Check contradictions
-        pairs = self.contra.detect_pairs(reranked)
+        pairs = self.contra.detect_pairs(reranked, cache=nli_cache)
         resolution = self.contra.resolve(reranked, pairs) if pairs else {"decisions": []}
 
-        # 3. Synthesize answer (very simple — in prod you’d use an LLM here)
-        answer = self._synthesize(query, reranked, resolution)
+        # 3. Synthesize answer
+        answer, gen_path = self._synthesize(query, reranked, resolution, raw_query=raw_query or query)
 
         # 4. Log everything
         record = {
             "query": query,
+            **log_extra,
             "retrieved": [
                 {k: v for k, v in c.items() if k in ["source_type", "doc_id", "chunk_id", "score", "rerank_score"]}
                 for c in reranked
@@ -91,6 +167,7 @@ class RAGPipeline:
             "contradictions": pairs,
             "resolution": resolution,
             "answer": answer,
+            "generator": gen_path,
         }
         log_path = self.logger.log(record)
         answer["log_file"] = log_path
@@ -98,19 +175,22 @@ class RAGPipeline:
         return answer
 
     # ---------------------------
-    # Simple synthesis (stub)
+    # Synthesis
     # ---------------------------
-    def _synthesize(self, query, chunks, resolution):
+    def _synthesize(self, query, chunks, resolution, raw_query):
         context = "\n\n".join(c["text"] for c in chunks[:5])
         prompt = f"Answer the medical question based only on the following context:\n\n{context}\n\nQuestion: {query}\nAnswer:"
 
-        gen = self.generator(prompt, max_length=256, do_sample=False)
-        answer = gen[0]["generated_text"]
+        # Never quote chunks the contradiction resolver discarded
+        discarded = {d["discarded"] for d in resolution.get("decisions", [])}
+        gen = self.generator.generate(raw_query, chunks, prompt, exclude=discarded)
 
-        return {
-            "response": answer + "\n\n⚠️ Disclaimer: This is not medical advice.",
+        answer = {
+            "response": gen["text"] + "\n\n⚠️ Disclaimer: This is not medical advice.",
+            # Always in rerank order, whichever path produced the text (evaluate.py scores these)
             "citations": [
                 {"source": c["source_type"], "doc": c["doc_id"], "chunk": c["chunk_id"]}
                 for c in chunks[:3]
             ],
-        }
\ No newline at end of file
+        }
+        return answer, gen["path"]
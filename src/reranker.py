@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 from sentence_transformers import CrossEncoder
 
 
@@ -15,19 +15,26 @@ class Reranker:
     # ---------------------------
     # Rerank candidates
     # ---------------------------
-    def rerank(self, query: str, candidates: List[Dict], top_k: int = 5) -> List[Dict]:
+    def rerank(self, query: str, candidates: List[Dict], top_k: int = 5, cache: Optional[Dict] = None) -> List[Dict]:
         if not candidates:
             return []
 
-        # Build pairs (query, candidate_text)
-        pairs = [(query, c["text"]) for c in candidates]
+        # Only score pairs we haven't seen (cache maps (query, chunk_id) -> score)
+        cache = {} if cache is None else cache
+        missing = [c for c in candidates if (query, c["chunk_id"]) not in cache]
 
-        # Predict scores
-        scores = self.ce.predict(pairs).tolist()
+        if missing:
+            # Build pairs (query, candidate_text)
+            pairs = [(query, c["text"]) for c in missing]
+
+            # Predict scores
+            scores = self.ce.predict(pairs).tolist()
+            for c, s in zip(missing, scores):
+                cache[(query, c["chunk_id"])] = float(s)
 
         # Attach scores back to candidates
-        for c, s in zip(candidates, scores):
-            c["rerank_score"] = float(s)
+        for c in candidates:
+            c["rerank_score"] = cache[(query, c["chunk_id"])]
 
         # Sort by rerank score
         ranked = sorted(candidates, key=lambda x: x["rerank_score"], reverse=True)[:top_k]
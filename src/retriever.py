@@ -18,9 +18,9 @@ class HybridRetriever:
     # ---------------------------
     # Unified search
     # ---------------------------
-    def search(self, query: str, k_bm25: int = 20, k_dense: int = 20, top_k: int = 10) -> List[Dict]:
+    def search(self, query: str, k_bm25: int = 20, k_dense: int = 20, top_k: int = 10, q_emb=None) -> List[Dict]:
         bm25_hits = self.index.bm25_search(query, k_bm25)
-        dense_hits = self.index.dense_search(query, k_dense)
+        dense_hits = self.index.dense_search(query, k_dense, q_emb=q_emb)
 
         # Normalize scores to [0,1] for fusion
         scores = {}